@@ -0,0 +1,346 @@
+# Offline record/replay harness for the NBA Analysis Agent.
+# Record mode captures each test case's model outputs and tool calls from its
+# MLflow trace into a cassette file. Replay mode builds the agent from its
+# local definition with a stub model that returns the recorded outputs, stub
+# tools that return the recorded results and a stub schema memory, so the
+# agent's orchestration, memory and tool dispatch overhead can be benchmarked
+# without calling the model, querying data or loading the registered agent.
+
+import inspect
+import json
+import os
+import re
+import time
+
+MODEL_SPAN_TYPES = {"LLM", "CHAT_MODEL"}
+TOOL_SPAN_TYPES = {"TOOL"}
+
+class CassetteMismatch(Exception):
+    """
+    Raised when a replayed run diverges from its recording.
+    """
+
+# COMMAND ----------
+
+def cassette_path(cassette_dir: str, test_name: str) -> str:
+    """
+    Returns the cassette file path for a test case.
+
+    Args:
+        cassette_dir: Directory holding cassette files
+        test_name: The test case name
+
+    Returns:
+        Path to the test case's JSON cassette
+    """
+    slug = re.sub(r"[^a-z0-9]+", "_", test_name.lower()).strip("_")
+    return os.path.join(cassette_dir, f"{slug}.json")
+
+def save_cassette(cassette_dir: str, cassette: dict) -> str:
+    """
+    Writes a cassette to disk.
+
+    Args:
+        cassette_dir: Directory holding cassette files
+        cassette: Output of record_cassette
+
+    Returns:
+        Path the cassette was written to
+    """
+    os.makedirs(cassette_dir, exist_ok=True)
+    path = cassette_path(cassette_dir, cassette["name"])
+    with open(path, "w") as f:
+        json.dump(cassette, f, indent=2, default=str)
+    return path
+
+def load_cassette(cassette_dir: str, test_name: str) -> dict:
+    """
+    Reads the cassette recorded for a test case.
+
+    Args:
+        cassette_dir: Directory holding cassette files
+        test_name: The test case name
+
+    Returns:
+        The cassette dictionary
+    """
+    with open(cassette_path(cassette_dir, test_name), "r") as f:
+        return json.load(f)
+
+# COMMAND ----------
+
+def _normalize_arguments(arguments) -> dict:
+    """
+    Reduces tool call arguments to a plain JSON-compatible dictionary.
+
+    Accepts a JSON string, and unwraps single-key wrappers such as
+    {"kwargs": {...}} that tracing may add around the real arguments.
+    """
+    if isinstance(arguments, str):
+        arguments = json.loads(arguments) if arguments else {}
+    arguments = arguments or {}
+    while len(arguments) == 1 and next(iter(arguments)) in ("kwargs", "inputs", "args", "arguments") \
+            and isinstance(next(iter(arguments.values())), dict):
+        arguments = next(iter(arguments.values()))
+    return json.loads(json.dumps(arguments, default=str))
+
+def _normalize_model_output(outputs) -> dict:
+    """
+    Reduces a model span's output to its text content and tool calls.
+    """
+    if isinstance(outputs, dict) and outputs.get("choices"):
+        outputs = outputs["choices"][0].get("message", {})
+    if not isinstance(outputs, dict):
+        return {"content": outputs, "tool_calls": []}
+
+    tool_calls = []
+    for call in outputs.get("tool_calls") or []:
+        function = call.get("function", call)
+        tool_calls.append({
+            "id": call.get("id"),
+            "name": function["name"],
+            "arguments": _normalize_arguments(function.get("arguments", {}))
+        })
+
+    return {"content": outputs.get("content"), "tool_calls": tool_calls}
+
+def record_cassette(test_case: dict, response: str, trace) -> dict:
+    """
+    Builds a cassette from a live test run and its MLflow trace.
+
+    Tool arguments are taken from the model's tool calls rather than from
+    the tool span inputs, which tracing may wrap or extend, so replay
+    compares them in the same shape the agent dispatches.
+
+    Args:
+        test_case: The test case that was run
+        response: The agent's final response
+        trace: The MLflow trace of the run, e.g. mlflow.get_last_active_trace()
+
+    Returns:
+        Cassette dictionary with model and tool events in call order
+    """
+    if trace is None:
+        raise ValueError(
+            f"No MLflow trace for test {test_case['name']!r}; enable tracing "
+            "(mlflow.tracing.enable()) before recording cassettes"
+        )
+
+    events = []
+    pending_calls = []
+    spans = sorted(trace.data.spans, key=lambda span: span.start_time_ns)
+    for span in spans:
+        span_type = str(span.span_type)
+        if span_type in MODEL_SPAN_TYPES:
+            output = _normalize_model_output(span.outputs)
+            pending_calls = list(output["tool_calls"])
+            events.append({"type": "model", "output": output})
+        elif span_type in TOOL_SPAN_TYPES:
+            if pending_calls and pending_calls[0]["name"] == span.name:
+                arguments = pending_calls.pop(0)["arguments"]
+            else:
+                arguments = _normalize_arguments(span.inputs)
+            events.append({
+                "type": "tool",
+                "name": span.name,
+                "arguments": arguments,
+                "result": span.outputs,
+                "duration_seconds": (span.end_time_ns - span.start_time_ns) / 1e9
+            })
+
+    return {
+        "name": test_case["name"],
+        "query": test_case["query"],
+        "response": response,
+        "events": events,
+        "recorded_at": time.time()
+    }
+
+# COMMAND ----------
+
+class ReplayModel:
+    """
+    Stub model endpoint that returns the armed cassette's recorded model
+    outputs in order, as chat completion responses.
+    """
+
+    def __init__(self):
+        self.arm({"events": []})
+
+    def arm(self, cassette: dict):
+        """
+        Loads a cassette's model outputs and resets the counters.
+        """
+        self.outputs = [event["output"] for event in cassette["events"] if event["type"] == "model"]
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __call__(self, messages: list, **kwargs) -> dict:
+        start_time = time.perf_counter()
+        if self.calls >= len(self.outputs):
+            raise CassetteMismatch(f"Model called {self.calls + 1} times, recording has {len(self.outputs)}")
+        output = self.outputs[self.calls]
+        self.calls += 1
+
+        message = {"role": "assistant", "content": output["content"]}
+        if output["tool_calls"]:
+            message["tool_calls"] = [
+                {
+                    "id": call.get("id") or f"call_{self.calls}_{i}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])}
+                }
+                for i, call in enumerate(output["tool_calls"])
+            ]
+        response = {"choices": [{"index": 0, "message": message}]}
+        self.seconds += time.perf_counter() - start_time
+        return response
+
+class ReplayTools:
+    """
+    Stub tools that return the armed cassette's recorded results in order,
+    checking that each call matches the recorded tool name and arguments.
+    """
+
+    def __init__(self):
+        self.arm({"events": []})
+
+    def arm(self, cassette: dict):
+        """
+        Loads a cassette's tool events and resets the counters.
+        """
+        self.events = [event for event in cassette["events"] if event["type"] == "tool"]
+        self.calls = 0
+        self.seconds = 0.0
+
+    def dispatch(self, name: str, arguments: dict):
+        start_time = time.perf_counter()
+        if self.calls >= len(self.events):
+            raise CassetteMismatch(f"Unrecorded tool call: {name}({arguments})")
+        event = self.events[self.calls]
+        arguments = _normalize_arguments(arguments)
+        if event["name"] != name or _normalize_arguments(event["arguments"]) != arguments:
+            raise CassetteMismatch(
+                f"Tool call {self.calls + 1} was {name}({arguments}), "
+                f"recorded {event['name']}({event['arguments']})"
+            )
+        self.calls += 1
+        self.seconds += time.perf_counter() - start_time
+        return event["result"]
+
+    def stub(self, name: str, function):
+        """
+        Returns a replacement for a tool function that dispatches its call,
+        with positional arguments bound to their parameter names.
+        """
+        signature = inspect.signature(function)
+        return lambda *args, **kwargs: self.dispatch(name, dict(signature.bind(*args, **kwargs).arguments))
+
+    def install(self, toolkits: list):
+        """
+        Replaces every function of the given toolkits with a stub.
+
+        Raises:
+            ValueError: If a toolkit does not expose its functions as a
+                tools dictionary, since its tools would then run live
+        """
+        for toolkit in toolkits:
+            tools = getattr(toolkit, "tools", None)
+            if not isinstance(tools, dict):
+                raise ValueError(
+                    f"Cannot stub the tools of {type(toolkit).__name__}: it has no tools "
+                    "dictionary, so replay would call them live"
+                )
+            for name, function in list(tools.items()):
+                tools[name] = self.stub(name, function)
+
+class ReplaySchemaMemory:
+    """
+    Stub for TableSchemaMemory that provides no schema context, so replay
+    does not read table schemas or samples. The recorded model outputs were
+    produced with the real schema context.
+    """
+
+    memory_variables = []
+
+    def load_memory_variables(self, inputs: dict) -> dict:
+        return {}
+
+    def save_context(self, inputs: dict, outputs: dict):
+        pass
+
+    def clear(self):
+        pass
+
+# COMMAND ----------
+
+class ReplayHarness:
+    """
+    An agent built for replay, with its stub model, tools and schema memory.
+
+    The agent is built once and reused for every test case, so its
+    ConversationBufferMemory carries over between test cases exactly as in
+    live runs.
+
+    Args:
+        build_agent: Function creating the agent from its local definition,
+            e.g. build_nba_analysis_agent; called with model and
+            schema_memory keyword arguments
+    """
+
+    def __init__(self, build_agent):
+        self.model = ReplayModel()
+        self.tools = ReplayTools()
+        self.agent = build_agent(model=self.model, schema_memory=ReplaySchemaMemory())
+        self.tools.install(self.agent.toolkits)
+
+    def session(self, cassette: dict) -> "ReplaySession":
+        """
+        Returns a context manager that replays one cassette.
+        """
+        return ReplaySession(self, cassette)
+
+class ReplaySession:
+    """
+    Context manager that runs a harness's agent against a cassette.
+
+    On entry the stub model and tools are armed with the cassette; on exit
+    the recorded tool calls must all have been made.
+
+    Args:
+        harness: A ReplayHarness
+        cassette: Output of record_cassette
+    """
+
+    def __init__(self, harness: ReplayHarness, cassette: dict):
+        self.model = harness.model
+        self.tools = harness.tools
+        self.cassette = cassette
+
+    def __enter__(self):
+        self.model.arm(self.cassette)
+        self.tools.arm(self.cassette)
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.total_seconds = time.perf_counter() - self._start_time
+        if exc_type is None and self.tools.calls != len(self.tools.events):
+            raise CassetteMismatch(
+                f"Replay made {self.tools.calls} tool calls, recording has {len(self.tools.events)}"
+            )
+        return False
+
+    def timings(self) -> dict:
+        """
+        Returns model, tool and orchestration seconds for the replayed run;
+        orchestration is the agent's own time outside the stubs.
+        """
+        return {
+            "model_calls": self.model.calls,
+            "tool_calls": self.tools.calls,
+            "model_seconds": self.model.seconds,
+            "tool_seconds": self.tools.seconds,
+            "total_seconds": self.total_seconds,
+            "orchestration_seconds": self.total_seconds - self.model.seconds - self.tools.seconds
+        }
@@ -4,6 +4,136 @@ spark.sql("USE SCHEMA sports_ai")
 
 # COMMAND ----------
 
+# MAGIC %run ./query_templates
+
+# COMMAND ----------
+
+# MAGIC %run ./player_store
+
+# COMMAND ----------
+
+# Serve career and season lookups from the in-process array store instead of
+# querying Spark on every call. Set to False to always query the tables; the
+# tables are also queried whenever a reload of the store fails.
+USE_PLAYER_STORE = True
+
+if USE_PLAYER_STORE:
+    load_player_store()
+
+# COMMAND ----------
+
+import json
+
+# Compact outputs: tabular results are encoded as a header row plus one value
+# array per row, which repeats no keys and costs far fewer prompt tokens.
+
+def _estimate_tokens(value) -> int:
+    """
+    Roughly estimates how many model tokens a result costs in the prompt.
+    """
+    return len(json.dumps(value, separators=(",", ":"))) // 4 + 1
+
+def _to_table(records: list, columns: list) -> dict:
+    """
+    Encodes a list of dictionaries as a header row and value arrays.
+    
+    Args:
+        records: Dictionaries sharing the same keys
+        columns: Keys to include, in output order
+        
+    Returns:
+        Dictionary with "columns" and "rows"
+    """
+    return {
+        "columns": columns,
+        "rows": [[record[column] for column in columns] for record in records]
+    }
+
+# Columns that identify a row rather than measure something; a min/max/mean
+# of them is meaningless, so they are left out of table summaries
+SUMMARY_EXCLUDED_COLUMNS = {"season", "team"}
+
+def _summarize_table(table: dict) -> dict:
+    """
+    Returns min, max and mean for each numeric stat column of a table,
+    encoded as a header row and value arrays like the table itself.
+    """
+    summary = {"columns": [], "min": [], "max": [], "mean": []}
+    for i, column in enumerate(table["columns"]):
+        if column in SUMMARY_EXCLUDED_COLUMNS:
+            continue
+        values = [row[i] for row in table["rows"] if isinstance(row[i], (int, float))]
+        if values:
+            summary["columns"].append(column)
+            summary["min"].append(min(values))
+            summary["max"].append(max(values))
+            summary["mean"].append(round(sum(values) / len(values), 1))
+    return summary
+
+def _sample_rows(rows: list, sample_size: int) -> list:
+    """
+    Returns an evenly spaced sample of rows, including the first and last.
+    """
+    if sample_size >= len(rows):
+        return rows
+    step = (len(rows) - 1) / (sample_size - 1)
+    return [rows[round(i * step)] for i in range(sample_size)]
+
+def _fit_table_to_budget(table: dict, max_tokens: int) -> dict:
+    """
+    Shrinks a table to a token budget, keeping column summaries and the
+    largest evenly spaced sample of rows (always including the first and
+    last) that fits.
+    
+    Args:
+        table: Output of _to_table
+        max_tokens: Approximate token budget for the result
+        
+    Returns:
+        The table unchanged if it fits, otherwise a summarized table with
+        "total_rows" and "estimated_tokens". "over_budget" is set when even
+        the summary with two rows does not fit; if summarizing would not
+        make the table smaller, it is returned unchanged with only
+        "estimated_tokens" and "over_budget" added.
+    """
+    table_tokens = _estimate_tokens(table)
+    if table_tokens <= max_tokens:
+        return table
+    
+    rows = table["rows"]
+    if len(rows) <= 2:
+        return dict(table, estimated_tokens=table_tokens, over_budget=True)
+    
+    fitted = {
+        "columns": table["columns"],
+        "rows": rows[:2],
+        "summary": _summarize_table(table),
+        "total_rows": len(rows)
+    }
+    
+    # Binary search for the largest sample that fits the budget
+    low, high = 3, len(rows)
+    while low <= high:
+        sample_size = (low + high) // 2
+        candidate = dict(fitted, rows=_sample_rows(rows, sample_size))
+        if _estimate_tokens(candidate) <= max_tokens:
+            fitted = candidate
+            low = sample_size + 1
+        else:
+            high = sample_size - 1
+    
+    if len(fitted["rows"]) == 2:
+        fitted["rows"] = _sample_rows(rows, 2)
+    
+    fitted["estimated_tokens"] = _estimate_tokens(fitted)
+    if fitted["estimated_tokens"] > max_tokens:
+        if fitted["estimated_tokens"] >= table_tokens:
+            return dict(table, estimated_tokens=table_tokens, over_budget=True)
+        fitted["over_budget"] = True
+    return fitted
+
+# COMMAND ----------
+
 def get_player_profile(name: str) -> str:
     """
     Returns a player's career timeline and basic bio info.
@@ -29,6 +159,22 @@ def get_player_profile(name: str) -> str:
 
 # COMMAND ----------
 
+_career_stats_query = QueryTemplate("career_stats", """
+    SELECT 
+        Player,
+        COUNT(DISTINCT Year) as seasons,
+        AVG(PTS) as ppg,
+        AVG(TRB) as rpg,
+        AVG(AST) as apg,
+        AVG(`FG%`) as fg_pct,
+        AVG(`3P%`) as fg3_pct,
+        AVG(`FT%`) as ft_pct,
+        AVG(WS) as win_shares
+    FROM Seasons_Stats
+    WHERE Player = :name
+    GROUP BY Player
+""")
+
 def get_player_career_stats(name: str) -> dict:
     """
     Returns a player's career average statistics.
@@ -39,24 +185,23 @@ def get_player_career_stats(name: str) -> dict:
     Returns:
         Dictionary with career averages for key statistics
     """
-    # Query the seasons stats table
-    stats_df = spark.sql(f"""
-        SELECT 
-            Player,
-            COUNT(DISTINCT Year) as seasons,
-            AVG(PTS) as ppg,
-            AVG(TRB) as rpg,
-            AVG(AST) as apg,
-            AVG(`FG%`) as fg_pct,
-            AVG(`3P%`) as fg3_pct,
-            AVG(`FT%`) as ft_pct,
-            AVG(WS) as win_shares
-        FROM Seasons_Stats
-        WHERE Player = '{name}'
-        GROUP BY Player
-    """)
-    
-    result = stats_df.collect()
+    store = get_player_store() if USE_PLAYER_STORE else None
+    if store is not None:
+        averages = store.career_averages(name)
+        result = [{
+            "Player": name,
+            "seasons": averages["seasons"],
+            "ppg": averages["pts"],
+            "rpg": averages["trb"],
+            "apg": averages["ast"],
+            "fg_pct": averages["fg_pct"],
+            "fg3_pct": averages["fg3_pct"],
+            "ft_pct": averages["ft_pct"],
+            "win_shares": averages["ws"]
+        }] if averages is not None else []
+    else:
+        # Query the seasons stats table
+        result = _career_stats_query.collect(name=name)
     
     if not result:
         return {"error": f"No stats found for {name}."}
@@ -76,6 +221,65 @@ def get_player_career_stats(name: str) -> dict:
 
 # COMMAND ----------
 
+_career_averages_query = QueryTemplate("career_averages", """
+    SELECT 
+        Player,
+        AVG(PTS) as pts,
+        AVG(TRB) as trb,
+        AVG(AST) as ast,
+        AVG(STL) as stl,
+        AVG(BLK) as blk,
+        AVG(`TS%`) as ts_pct,
+        AVG(PER) as per
+    FROM Seasons_Stats
+    WHERE Player = :name
+    GROUP BY Player
+""")
+
+_similar_players_query = QueryTemplate("similar_players", """
+    WITH target_stats AS (
+        SELECT 
+            :name as player,
+            :pts as pts,
+            :trb as trb,
+            :ast as ast,
+            :stl as stl,
+            :blk as blk,
+            :ts_pct as ts_pct,
+            :per as per
+    ),
+    player_stats AS (
+        SELECT 
+            s.Player,
+            AVG(s.PTS) as pts,
+            AVG(s.TRB) as trb,
+            AVG(s.AST) as ast,
+            AVG(s.STL) as stl,
+            AVG(s.BLK) as blk,
+            AVG(s.`TS%`) as ts_pct,
+            AVG(s.PER) as per
+        FROM Seasons_Stats s
+        JOIN player_data p ON s.Player = p.name
+        WHERE s.Player != :name
+        AND (:position = '' OR p.position LIKE CONCAT('%', :position, '%'))
+        GROUP BY s.Player
+        HAVING COUNT(DISTINCT s.Year) >= 3
+    )
+    SELECT 
+        p.Player,
+        p.pts, p.trb, p.ast,
+        POWER(p.pts - t.pts, 2) + 
+        POWER(p.trb - t.trb, 2) * 1.5 + 
+        POWER(p.ast - t.ast, 2) * 1.5 + 
+        POWER(p.stl - t.stl, 2) * 2 + 
+        POWER(p.blk - t.blk, 2) * 2 + 
+        POWER((p.ts_pct - t.ts_pct) * 100, 2) * 0.5 + 
+        POWER(p.per - t.per, 2) * 3 as similarity_score
+    FROM player_stats p, target_stats t
+    ORDER BY similarity_score ASC
+    LIMIT {limit}
+""")
+
 def find_similar_players(name: str, limit: int = 5) -> list:
     """
     Finds players with similar statistical profiles to the given player.
@@ -88,20 +292,7 @@ def find_similar_players(name: str, limit: int = 5) -> list:
         List of dictionaries with similar players and similarity scores
     """
     # First, get the target player's career averages
-    target_stats = spark.sql(f"""
-        SELECT 
-            Player,
-            AVG(PTS) as pts,
-            AVG(TRB) as trb,
-            AVG(AST) as ast,
-            AVG(STL) as stl,
-            AVG(BLK) as blk,
-            AVG(`TS%`) as ts_pct,
-            AVG(PER) as per
-        FROM Seasons_Stats
-        WHERE Player = '{name}'
-        GROUP BY Player
-    """).collect()
+    target_stats = _career_averages_query.collect(name=name)
     
     if not target_stats:
         return [{"error": f"No stats found for {name}."}]
@@ -110,55 +301,22 @@ def find_similar_players(name: str, limit: int = 5) -> list:
     position_data = spark.table("player_data")
     position_result = position_data.filter(position_data.name == name).select("position").collect()
     
-    if not position_result:
-        position_filter = ""
-    else:
-        position = position_result[0]["position"]
-        position_filter = f"AND p.position LIKE '%{position}%'"
+    position = position_result[0]["position"] if position_result else ""
     
     # Now find similar players using a similarity score calculation
-    similar_players = spark.sql(f"""
-        WITH target_stats AS (
-            SELECT 
-                '{name}' as player,
-                {target_stats[0]['pts']} as pts,
-                {target_stats[0]['trb']} as trb,
-                {target_stats[0]['ast']} as ast,
-                {target_stats[0]['stl']} as stl,
-                {target_stats[0]['blk']} as blk,
-                {target_stats[0]['ts_pct']} as ts_pct,
-                {target_stats[0]['per']} as per
-        ),
-        player_stats AS (
-            SELECT 
-                s.Player,
-                AVG(s.PTS) as pts,
-                AVG(s.TRB) as trb,
-                AVG(s.AST) as ast,
-                AVG(s.STL) as stl,
-                AVG(s.BLK) as blk,
-                AVG(s.`TS%`) as ts_pct,
-                AVG(s.PER) as per
-            FROM Seasons_Stats s
-            JOIN player_data p ON s.Player = p.name
-            WHERE s.Player != '{name}' {position_filter}
-            GROUP BY s.Player
-            HAVING COUNT(DISTINCT s.Year) >= 3
-        )
-        SELECT 
-            p.Player,
-            p.pts, p.trb, p.ast,
-            POWER(p.pts - t.pts, 2) + 
-            POWER(p.trb - t.trb, 2) * 1.5 + 
-            POWER(p.ast - t.ast, 2) * 1.5 + 
-            POWER(p.stl - t.stl, 2) * 2 + 
-            POWER(p.blk - t.blk, 2) * 2 + 
-            POWER((p.ts_pct - t.ts_pct) * 100, 2) * 0.5 + 
-            POWER(p.per - t.per, 2) * 3 as similarity_score
-        FROM player_stats p, target_stats t
-        ORDER BY similarity_score ASC
-        LIMIT {limit}
-    """).collect()
+    target = target_stats[0]
+    similar_players = _similar_players_query.collect(
+        name=name,
+        position=position,
+        limit=limit,
+        pts=target["pts"],
+        trb=target["trb"],
+        ast=target["ast"],
+        stl=target["stl"],
+        blk=target["blk"],
+        ts_pct=target["ts_pct"],
+        per=target["per"]
+    )
     
     return [
         {
@@ -173,40 +331,63 @@ def find_similar_players(name: str, limit: int = 5) -> list:
 
 # COMMAND ----------
 
-def get_player_season_progression(name: str) -> list:
+_season_progression_query = QueryTemplate("season_progression", """
+    SELECT 
+        Year,
+        Tm as team,
+        G as games,
+        PTS as ppg,
+        TRB as rpg,
+        AST as apg,
+        STL as spg,
+        BLK as bpg,
+        `FG%` as fg_pct,
+        `3P%` as fg3_pct,
+        `FT%` as ft_pct,
+        PER,
+        WS as win_shares
+    FROM Seasons_Stats
+    WHERE Player = :name
+    ORDER BY Year
+""")
+
+def get_player_season_progression(name: str, compact: bool = True, max_tokens: int = None) -> dict | list:
     """
     Returns a player's statistical progression across seasons.
     
     Args:
         name: The player's name
+        compact: Return a table with "columns" and "rows" instead of one
+            dictionary per season
+        max_tokens: Optional token budget for the compact table; longer
+            careers are reduced to column summaries and sampled seasons
         
     Returns:
-        List of dictionaries with stats for each season
+        Table of stats for each season, or a list of dictionaries when
+        compact is False
     """
-    season_stats = spark.sql(f"""
-        SELECT 
-            Year,
-            Tm as team,
-            G as games,
-            PTS as ppg,
-            TRB as rpg,
-            AST as apg,
-            STL as spg,
-            BLK as bpg,
-            `FG%` as fg_pct,
-            `3P%` as fg3_pct,
-            `FT%` as ft_pct,
-            PER,
-            WS as win_shares
-        FROM Seasons_Stats
-        WHERE Player = '{name}'
-        ORDER BY Year
-    """).collect()
+    store = get_player_store() if USE_PLAYER_STORE else None
+    if store is not None:
+        table = store.season_progression(name)
+        if table is None:
+            error = {"error": f"No season stats found for {name}."}
+            return error if compact else [error]
+        
+        if not compact:
+            return [dict(zip(table["columns"], values)) for values in table["rows"]]
+        
+        if max_tokens is not None:
+            table = _fit_table_to_budget(table, max_tokens)
+        table["player"] = name
+        return table
+    
+    season_stats = _season_progression_query.collect(name=name)
     
     if not season_stats:
-        return [{"error": f"No season stats found for {name}."}]
+        error = {"error": f"No season stats found for {name}."}
+        return error if compact else [error]
     
-    return [
+    seasons = [
         {
             "season": int(row["Year"]),
             "team": row["team"],
@@ -224,9 +405,38 @@ def get_player_season_progression(name: str) -> list:
         }
         for row in season_stats
     ]
+    
+    if not compact:
+        return seasons
+    
+    table = _to_table(seasons, list(seasons[0].keys()))
+    if max_tokens is not None:
+        table = _fit_table_to_budget(table, max_tokens)
+    table["player"] = name
+    return table
 
 # COMMAND ----------
 
+_position_averages_query = QueryTemplate("position_averages", """
+    WITH position_players AS (
+        SELECT s.Player, p.position
+        FROM Seasons_Stats s
+        JOIN player_data p ON s.Player = p.name
+        WHERE p.position LIKE CONCAT('%', :position, '%')
+        GROUP BY s.Player, p.position
+    )
+    SELECT 
+        AVG(s.PTS) as avg_pts,
+        AVG(s.TRB) as avg_trb,
+        AVG(s.AST) as avg_ast,
+        AVG(s.STL) as avg_stl,
+        AVG(s.BLK) as avg_blk,
+        AVG(s.`TS%`) as avg_ts_pct,
+        AVG(s.PER) as avg_per
+    FROM Seasons_Stats s
+    JOIN position_players p ON s.Player = p.Player
+""")
+
 def analyze_player_strengths(name: str) -> dict:
     """
     Analyzes a player's statistical strengths relative to position averages.
@@ -247,40 +457,10 @@ def analyze_player_strengths(name: str) -> dict:
     position = position_result[0]["position"]
     
     # Calculate position averages
-    position_avg = spark.sql(f"""
-        WITH position_players AS (
-            SELECT s.Player, p.position
-            FROM Seasons_Stats s
-            JOIN player_data p ON s.Player = p.name
-            WHERE p.position LIKE '%{position}%'
-            GROUP BY s.Player, p.position
-        )
-        SELECT 
-            AVG(s.PTS) as avg_pts,
-            AVG(s.TRB) as avg_trb,
-            AVG(s.AST) as avg_ast,
-            AVG(s.STL) as avg_stl,
-            AVG(s.BLK) as avg_blk,
-            AVG(s.`TS%`) as avg_ts_pct,
-            AVG(s.PER) as avg_per
-        FROM Seasons_Stats s
-        JOIN position_players p ON s.Player = p.Player
-    """).collect()[0]
+    position_avg = _position_averages_query.collect(position=position)[0]
     
     # Get player stats
-    player_stats = spark.sql(f"""
-        SELECT 
-            AVG(PTS) as pts,
-            AVG(TRB) as trb,
-            AVG(AST) as ast,
-            AVG(STL) as stl,
-            AVG(BLK) as blk,
-            AVG(`TS%`) as ts_pct,
-            AVG(PER) as per
-        FROM Seasons_Stats
-        WHERE Player = '{name}'
-        GROUP BY Player
-    """).collect()
+    player_stats = _career_averages_query.collect(name=name)
     
     if not player_stats:
         return {"error": f"No stats found for {name}."}
@@ -347,92 +527,116 @@ def analyze_player_strengths(name: str) -> dict:
 
 # COMMAND ----------
 
-def compare_players(player1: str, player2: str) -> dict:
+_comparison_query = QueryTemplate("comparison", """
+    WITH player1_stats AS (
+        SELECT 
+            :player1 as player,
+            AVG(PTS) as pts,
+            AVG(TRB) as trb,
+            AVG(AST) as ast,
+            AVG(STL) as stl,
+            AVG(BLK) as blk,
+            AVG(`TS%`) as ts_pct,
+            AVG(PER) as per,
+            AVG(WS) as ws,
+            COUNT(DISTINCT Year) as seasons
+        FROM Seasons_Stats
+        WHERE Player = :player1
+        GROUP BY Player
+    ),
+    player2_stats AS (
+        SELECT 
+            :player2 as player,
+            AVG(PTS) as pts,
+            AVG(TRB) as trb,
+            AVG(AST) as ast,
+            AVG(STL) as stl,
+            AVG(BLK) as blk,
+            AVG(`TS%`) as ts_pct,
+            AVG(PER) as per,
+            AVG(WS) as ws,
+            COUNT(DISTINCT Year) as seasons
+        FROM Seasons_Stats
+        WHERE Player = :player2
+        GROUP BY Player
+    )
+    SELECT 
+        p1.player as player1,
+        p2.player as player2,
+        p1.pts as p1_pts,
+        p2.pts as p2_pts,
+        p1.trb as p1_trb,
+        p2.trb as p2_trb,
+        p1.ast as p1_ast,
+        p2.ast as p2_ast,
+        p1.stl as p1_stl,
+        p2.stl as p2_stl,
+        p1.blk as p1_blk,
+        p2.blk as p2_blk,
+        p1.ts_pct as p1_ts_pct,
+        p2.ts_pct as p2_ts_pct,
+        p1.per as p1_per,
+        p2.per as p2_per,
+        p1.ws as p1_ws,
+        p2.ws as p2_ws,
+        p1.seasons as p1_seasons,
+        p2.seasons as p2_seasons
+    FROM player1_stats p1, player2_stats p2
+""")
+
+_positions_query = QueryTemplate("positions", """
+    SELECT 
+        name, position
+    FROM player_data
+    WHERE name IN (:player1, :player2)
+""")
+
+def compare_players(player1: str, player2: str, compact: bool = True) -> dict:
     """
     Compares two players across key statistical categories.
     
     Args:
         player1: First player's name
         player2: Second player's name
+        compact: Return career stats as a table with "columns" and "rows"
+            instead of one nested dictionary per statistic
         
     Returns:
         Dictionary with comparative statistics
     """
-    # Get career stats for both players
-    comparison_stats = spark.sql(f"""
-        WITH player1_stats AS (
-            SELECT 
-                '{player1}' as player,
-                AVG(PTS) as pts,
-                AVG(TRB) as trb,
-                AVG(AST) as ast,
-                AVG(STL) as stl,
-                AVG(BLK) as blk,
-                AVG(`TS%`) as ts_pct,
-                AVG(PER) as per,
-                AVG(WS) as ws,
-                COUNT(DISTINCT Year) as seasons
-            FROM Seasons_Stats
-            WHERE Player = '{player1}'
-            GROUP BY Player
-        ),
-        player2_stats AS (
-            SELECT 
-                '{player2}' as player,
-                AVG(PTS) as pts,
-                AVG(TRB) as trb,
-                AVG(AST) as ast,
-                AVG(STL) as stl,
-                AVG(BLK) as blk,
-                AVG(`TS%`) as ts_pct,
-                AVG(PER) as per,
-                AVG(WS) as ws,
-                COUNT(DISTINCT Year) as seasons
-            FROM Seasons_Stats
-            WHERE Player = '{player2}'
-            GROUP BY Player
-        )
-        SELECT 
-            p1.player as player1,
-            p2.player as player2,
-            p1.pts as p1_pts,
-            p2.pts as p2_pts,
-            p1.trb as p1_trb,
-            p2.trb as p2_trb,
-            p1.ast as p1_ast,
-            p2.ast as p2_ast,
-            p1.stl as p1_stl,
-            p2.stl as p2_stl,
-            p1.blk as p1_blk,
-            p2.blk as p2_blk,
-            p1.ts_pct as p1_ts_pct,
-            p2.ts_pct as p2_ts_pct,
-            p1.per as p1_per,
-            p2.per as p2_per,
-            p1.ws as p1_ws,
-            p2.ws as p2_ws,
-            p1.seasons as p1_seasons,
-            p2.seasons as p2_seasons
-        FROM player1_stats p1, player2_stats p2
-    """).collect()
-    
-    if not comparison_stats:
-        return {"error": f"Could not find stats for both {player1} and {player2}."}
-    
-    row = comparison_stats[0]
-    
-    # Get position data
-    positions = spark.sql(f"""
-        SELECT 
-            name, position
-        FROM player_data
-        WHERE name IN ('{player1}', '{player2}')
-    """).collect()
-    
-    position_map = {p["name"]: p["position"] for p in positions}
+    store = get_player_store() if USE_PLAYER_STORE else None
+    if store is not None:
+        career = [store.career_averages(player1), store.career_averages(player2)]
+        if None in career:
+            return {"error": f"Could not find stats for both {player1} and {player2}."}
+        
+        # Same p1_/p2_ keys as the comparison query, so formatting is shared
+        row = {
+            f"p{i}_{column}": averages[column]
+            for i, averages in enumerate(career, start=1)
+            for column in ("pts", "trb", "ast", "stl", "blk", "ts_pct", "per", "ws", "seasons")
+        }
+        position_map = {
+            name: store.position(name)
+            for name in (player1, player2)
+            if name in store.position_index
+        }
+    else:
+        # Get career stats for both players
+        comparison_stats = _comparison_query.collect(player1=player1, player2=player2)
+        
+        if not comparison_stats:
+            return {"error": f"Could not find stats for both {player1} and {player2}."}
+        
+        row = comparison_stats[0]
+        
+        # Get position data
+        positions = _positions_query.collect(player1=player1, player2=player2)
+        
+        position_map = {p["name"]: p["position"] for p in positions}
     
     # Format the comparison
-    return {
+    comparison = {
         "players": {
             "player1": {
                 "name": player1,
@@ -491,3 +695,121 @@ def compare_players(player1: str, player2: str) -> dict:
             }
         }
     }
+    
+    if not compact:
+        return comparison
+    
+    return {
+        "players": [player1, player2],
+        "positions": [position_map.get(player1, "Unknown"), position_map.get(player2, "Unknown")],
+        **_to_table(
+            [{"stat": stat, **values} for stat, values in comparison["career_stats"].items()],
+            ["stat", "player1", "player2", "difference"]
+        )
+    }
+
+# COMMAND ----------
+
+_position_leaders_query = QueryTemplate("position_leaders", """
+    SELECT s.Player, s.Year, s.PTS, s.TRB, s.AST, s.WS
+    FROM Seasons_Stats s
+    JOIN player_data p ON s.Player = p.name
+    WHERE p.position LIKE CONCAT('%', :position, '%')
+    AND s.Year = :season
+    ORDER BY s.`{stat_category}` DESC
+    LIMIT {limit}
+""")
+
+def get_position_leaders(position: str, season: int, stat_category: str = "PTS", limit: int = 10) -> dict:
+    """
+    Returns the season leaders at a position in a statistical category.
+    
+    Args:
+        position: Position to filter on, e.g. "C" or "PG"
+        season: Season year
+        stat_category: Column to rank by (see ALLOWED_IDENTIFIERS)
+        limit: Maximum number of players to return, clamped to 1-100
+        
+    Returns:
+        Table with "columns" and "rows" of the leading players
+    """
+    try:
+        leaders = _position_leaders_query.collect(
+            position=position, season=season, stat_category=stat_category, limit=limit
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    if not leaders:
+        return {"error": f"No {position} stats found for {season}."}
+    
+    return {
+        "columns": ["player", "season", "ppg", "rpg", "apg", "win_shares"],
+        "rows": [
+            [
+                row["Player"],
+                int(row["Year"]),
+                round(float(row["PTS"]), 1),
+                round(float(row["TRB"]), 1),
+                round(float(row["AST"]), 1),
+                round(float(row["WS"]), 1) if row["WS"] is not None else None
+            ]
+            for row in leaders
+        ]
+    }
+
+# COMMAND ----------
+
+_efficiency_leaders_query = QueryTemplate("efficiency_leaders", """
+    SELECT s.Player, p.position, s.Year,
+           s.PTS, s.`TS%`, s.PER, s.WS, s.`WS/48`,
+           s.OBPM, s.DBPM, s.BPM, s.VORP
+    FROM Seasons_Stats s
+    JOIN player_data p ON s.Player = p.name
+    WHERE s.Year = :season
+    AND p.position LIKE CONCAT('%', :position, '%')
+    AND s.G >= :min_games
+    ORDER BY s.`{sort_by}` DESC
+    LIMIT {limit}
+""")
+
+def get_efficiency_leaders(position: str, season: int, min_games: int = 20,
+                           sort_by: str = "PER", limit: int = 10) -> dict:
+    """
+    Returns the most efficient players at a position in a season.
+    
+    Args:
+        position: Position to filter on, e.g. "C" or "PG"
+        season: Season year
+        min_games: Minimum games played
+        sort_by: Column to rank by (see ALLOWED_IDENTIFIERS)
+        limit: Maximum number of players to return, clamped to 1-100
+        
+    Returns:
+        Table with "columns" and "rows" of efficiency metrics
+    """
+    try:
+        leaders = _efficiency_leaders_query.collect(
+            position=position, season=season, min_games=min_games, sort_by=sort_by, limit=limit
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    if not leaders:
+        return {"error": f"No {position} stats found for {season} with at least {min_games} games."}
+    
+    stats = ["PTS", "TS%", "PER", "WS", "WS/48", "OBPM", "DBPM", "BPM", "VORP"]
+    return {
+        "columns": ["player", "position", "season", "ppg", "ts_pct", "per", "win_shares",
+                    "ws_per_48", "obpm", "dbpm", "bpm", "vorp"],
+        "rows": [
+            [row["Player"], row["position"], int(row["Year"])] + [
+                None if row[stat] is None
+                else round(float(row[stat]) * 100, 1) if stat == "TS%"
+                else round(float(row[stat]), 3) if stat == "WS/48"
+                else round(float(row[stat]), 1)
+                for stat in stats
+            ]
+            for row in leaders
+        ]
+    }
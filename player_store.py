@@ -0,0 +1,246 @@
+# In-process, array-backed player store for the serving path.
+# Season rows are held as typed NumPy column arrays sorted by player and
+# year, with player, team and position strings dictionary-encoded and an
+# offset index per player, so a tool call reads a slice instead of running
+# a Spark query and building a Row and a dict per season. The store is
+# reloaded whenever the source tables move to a new Delta version.
+
+import logging
+import sys
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger("player_store")
+
+# COMMAND ----------
+
+# MAGIC %run ./table_versions
+
+# COMMAND ----------
+
+# Seasons_Stats column -> store column
+SEASON_FLOAT_COLUMNS = {
+    "PTS": "pts",
+    "TRB": "trb",
+    "AST": "ast",
+    "STL": "stl",
+    "BLK": "blk",
+    "FG%": "fg_pct",
+    "3P%": "fg3_pct",
+    "FT%": "ft_pct",
+    "TS%": "ts_pct",
+    "PER": "per",
+    "WS": "ws"
+}
+
+def _encode(values) -> tuple:
+    """
+    Dictionary-encodes a Pandas Series of strings, with nulls as code -1.
+
+    Returns:
+        Tuple of (codes, dictionary) where dictionary is an object array of
+        interned strings followed by None, so dictionary[codes] decodes
+        nulls back to None
+    """
+    present = values.notna().to_numpy()
+    codes = np.full(len(values), -1, dtype=np.int32)
+    dictionary, codes[present] = np.unique(values.to_numpy(dtype=object)[present].astype(str), return_inverse=True)
+    return codes, np.array([sys.intern(value) for value in dictionary.tolist()] + [None], dtype=object)
+
+def _rounded(values: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """
+    Scales and rounds an array to one decimal, mapping NaN to None.
+    """
+    rounded = np.round(values * scale, 1)
+    return np.where(np.isnan(rounded), None, rounded)
+
+def _integers(values: np.ndarray) -> np.ndarray:
+    """
+    Converts a float array of whole numbers to ints, mapping NaN to None.
+    """
+    missing = np.isnan(values)
+    return np.where(missing, None, np.where(missing, 0, values).astype(np.int64).astype(object))
+
+# COMMAND ----------
+
+class PlayerStore:
+    """
+    Column arrays of season and career data, indexed by player.
+
+    Args:
+        seasons: Pandas DataFrame of Seasons_Stats with Player, Year, Tm, G
+            and the SEASON_FLOAT_COLUMNS
+        players: Pandas DataFrame of player_data with name and position
+        table_versions: Delta versions of the source tables the data was
+            read at
+    """
+
+    def __init__(self, seasons, players, table_versions: dict = None):
+        seasons = seasons[seasons["Player"].notna() & seasons["Year"].notna()]
+
+        player_codes, player_names = _encode(seasons["Player"])
+        self.player_names = player_names[:-1].tolist()
+        years = seasons["Year"].to_numpy(dtype=np.int16)
+        order = np.lexsort((years, player_codes))
+
+        self.player_codes = player_codes[order]
+        self.years = years[order]
+        self.games = seasons["G"].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        # Null teams get code -1 and read back as None
+        team_codes, self.team_names = _encode(seasons["Tm"])
+        self.team_codes = team_codes[order]
+        self.columns = {
+            column: seasons[source].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+            for source, column in SEASON_FLOAT_COLUMNS.items()
+        }
+
+        # offsets[i]:offsets[i + 1] is the slice of rows for player code i
+        self.offsets = np.searchsorted(self.player_codes, np.arange(len(self.player_names) + 1))
+        self.player_index = {name: code for code, name in enumerate(self.player_names)}
+
+        # Career aggregates match SQL AVG (nulls ignored) and COUNT(DISTINCT Year)
+        starts = self.offsets[:-1]
+        self.career = {}
+        for column, values in self.columns.items():
+            present = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(present, values, 0.0), starts)
+            counts = np.add.reduceat(present.astype(np.int32), starts)
+            self.career[column] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        new_season = np.ones(len(self.years), dtype=bool)
+        new_season[1:] = (self.years[1:] != self.years[:-1]) | (self.player_codes[1:] != self.player_codes[:-1])
+        self.career_seasons = np.add.reduceat(new_season.astype(np.int32), starts)
+
+        # Null positions get code -1 and read back as None, like the Spark path
+        players = players[players["name"].notna()].drop_duplicates("name")
+        position_codes, self.position_names = _encode(players["position"])
+        self.position_index = dict(zip(players["name"].tolist(), position_codes.tolist()))
+
+        self.table_versions = table_versions
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_spark(cls):
+        """
+        Loads the store from the Seasons_Stats and player_data tables.
+        """
+        # Versions are read first, so a table updated during the load is
+        # picked up by the next version check
+        table_versions = current_table_versions()
+        seasons = spark.table("Seasons_Stats").select(
+            "Player", "Year", "Tm", "G", *[f"`{source}`" for source in SEASON_FLOAT_COLUMNS]
+        ).toPandas()
+        players = spark.table("player_data").select("name", "position").toPandas()
+        return cls(seasons, players, table_versions)
+
+    def _rows(self, name: str):
+        code = self.player_index.get(name)
+        if code is None:
+            return None
+        return slice(self.offsets[code], self.offsets[code + 1])
+
+    def season_progression(self, name: str) -> dict:
+        """
+        Returns a player's seasons as an output-ready table.
+
+        Args:
+            name: The player's name
+
+        Returns:
+            Dictionary with "columns" and "rows", or None if the player is
+            not in the store
+        """
+        rows = self._rows(name)
+        if rows is None:
+            return None
+
+        columns = self.columns
+        values = {
+            "season": self.years[rows],
+            "team": self.team_names[self.team_codes[rows]],
+            "games": _integers(self.games[rows]),
+            "ppg": _rounded(columns["pts"][rows]),
+            "rpg": _rounded(columns["trb"][rows]),
+            "apg": _rounded(columns["ast"][rows]),
+            "spg": _rounded(columns["stl"][rows]),
+            "bpg": _rounded(columns["blk"][rows]),
+            "fg_pct": _rounded(columns["fg_pct"][rows], 100),
+            "fg3_pct": _rounded(columns["fg3_pct"][rows], 100),
+            "ft_pct": _rounded(columns["ft_pct"][rows], 100),
+            "per": _rounded(columns["per"][rows]),
+            "win_shares": _rounded(columns["ws"][rows])
+        }
+
+        # Fill an object matrix column by column and convert it to row lists
+        # in one pass
+        table = np.empty((rows.stop - rows.start, len(values)), dtype=object)
+        for i, column in enumerate(values.values()):
+            table[:, i] = column
+        return {"columns": list(values), "rows": table.tolist()}
+
+    def career_averages(self, name: str) -> dict:
+        """
+        Returns a player's unrounded career averages.
+
+        Args:
+            name: The player's name
+
+        Returns:
+            Dictionary of column name -> average (None where the player has
+            no values) plus seasons, or None if the player is not in the store
+        """
+        code = self.player_index.get(name)
+        if code is None:
+            return None
+
+        averages = {column: values[code] for column, values in self.career.items()}
+        averages = {column: None if np.isnan(value) else float(value) for column, value in averages.items()}
+        averages["seasons"] = int(self.career_seasons[code])
+        return averages
+
+    def position(self, name: str) -> str:
+        """
+        Returns a player's position, or None if it is null or the player is
+        not in player_data.
+        """
+        return self.position_names[self.position_index.get(name, -1)]
+
+# COMMAND ----------
+
+_player_store = None
+_player_store_lock = threading.Lock()
+
+def load_player_store() -> PlayerStore:
+    """
+    Loads the store from Spark and makes it the shared store. Called at
+    notebook start so no user request pays for the initial load.
+    """
+    global _player_store
+    store = PlayerStore.from_spark()
+    _player_store = store
+    return store
+
+def get_player_store() -> PlayerStore:
+    """
+    Returns the shared player store, reloading it first if the source
+    tables have moved to a new Delta version. Versions come from
+    current_table_versions, as in the response cache, so an answer is
+    never cached under a newer version than the store it was read from.
+
+    Returns:
+        The store, or None if the reload fails; callers then fall back to
+        querying Spark rather than serving stale data
+    """
+    store = _player_store
+    if store is not None and store.table_versions == current_table_versions():
+        return store
+
+    with _player_store_lock:
+        if _player_store is not None and _player_store.table_versions == current_table_versions():
+            return _player_store
+        try:
+            return load_player_store()
+        except Exception as e:
+            logger.warning("Player store reload failed, falling back to Spark: %s", e)
+            return None
@@ -0,0 +1,177 @@
+# Parameterized query templates for the NBA Analysis Agent.
+# Each template is prepared once; values are bound at call time through
+# Spark named parameter markers and identifiers are checked against a
+# whitelist, so names like "Shaquille O'Neal" never reach the SQL text.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# COMMAND ----------
+
+# Identifiers that may be substituted into a template's {slot} positions.
+# Integer slots (e.g. LIMIT) are coerced with int() and clamped to the range.
+ALLOWED_IDENTIFIERS = {
+    "stat_category": {"PTS", "TRB", "AST", "STL", "BLK", "WS", "PER", "VORP"},
+    "sort_by": {"PTS", "TS%", "PER", "WS", "OBPM", "DBPM", "BPM", "VORP"},
+    "limit": range(1, 101)
+}
+
+# Every prepared template by name, for query_template_stats
+QUERY_TEMPLATES = {}
+
+class QueryTemplate:
+    """
+    A SQL template prepared once and executed with bound parameters.
+
+    Values are written as named markers (:player_name) and bound through
+    spark.sql(args=...). Identifiers that cannot be parameterized, such as
+    ORDER BY columns, are written as {slot} and must appear in
+    ALLOWED_IDENTIFIERS; an identifier outside the whitelist raises
+    ValueError.
+
+    Spark binds parameter values into the analyzed plan, so plans cannot be
+    shared between different values. The analyzed DataFrame is only reused
+    when the exact same binding (e.g. the same player) is requested again.
+    Compile (parse + analyze) and execution time are tracked separately in
+    stats. Templates are safe to call from concurrent requests.
+
+    Args:
+        name: Template name used in stats and error messages
+        sql: SQL text with :param markers and {slot} identifiers
+        max_plans: Maximum bindings whose DataFrames are kept
+        plan_ttl_seconds: Lifetime of a cached DataFrame, so long-lived
+            plans do not outlast table updates
+    """
+
+    def __init__(self, name: str, sql: str, max_plans: int = 128, plan_ttl_seconds: int = 300):
+        self.name = name
+        self.sql = sql
+        self.slots = sorted(set(re.findall(r"\{(\w+)\}", sql)))
+        self.params = sorted(set(re.findall(r"(?<!:):(\w+)", re.sub(r"'[^']*'", "", sql))))
+        self.max_plans = max_plans
+        self.plan_ttl_seconds = plan_ttl_seconds
+
+        unknown_slots = [slot for slot in self.slots if slot not in ALLOWED_IDENTIFIERS]
+        if unknown_slots:
+            raise ValueError(f"Template {name} has slots without a whitelist: {unknown_slots}")
+
+        self._rendered = {}
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "compiles": 0,
+            "compile_seconds": 0.0,
+            "executions": 0,
+            "execute_seconds": 0.0,
+            "repeated_binding_hits": 0
+        }
+        QUERY_TEMPLATES[name] = self
+
+    def _render(self, identifiers: dict) -> str:
+        key = tuple(identifiers[slot] for slot in self.slots)
+        with self._lock:
+            if key not in self._rendered:
+                self._rendered[key] = self.sql.format(**identifiers)
+            return self._rendered[key]
+
+    def _validate(self, values: dict) -> tuple:
+        missing = [name for name in self.slots + self.params if name not in values]
+        if missing:
+            raise ValueError(f"Missing parameters for {self.name}: {missing}")
+
+        identifiers = {}
+        for slot in self.slots:
+            allowed = ALLOWED_IDENTIFIERS[slot]
+            if isinstance(allowed, range):
+                identifiers[slot] = min(max(int(values[slot]), allowed.start), allowed.stop - 1)
+                continue
+            if values[slot] not in allowed:
+                raise ValueError(f"Invalid {slot} for {self.name}: {values[slot]!r}")
+            identifiers[slot] = values[slot]
+
+        args = {param: values[param] for param in self.params}
+        return identifiers, args
+
+    def dataframe(self, **values):
+        """
+        Returns the analyzed DataFrame for a binding, reusing the one from an
+        earlier call with identical values when available.
+
+        Args:
+            values: Identifier slots and parameter values
+
+        Returns:
+            A Spark DataFrame
+        """
+        identifiers, args = self._validate(values)
+        key = (tuple(identifiers.items()), tuple(sorted(args.items())))
+
+        now = time.time()
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None and now - cached[1] <= self.plan_ttl_seconds:
+                self._plans.move_to_end(key)
+                self.stats["repeated_binding_hits"] += 1
+                return cached[0]
+
+        # Compile outside the lock so other bindings are not serialized
+        # behind Spark analysis
+        start_time = time.time()
+        df = spark.sql(self._render(identifiers), args=args)
+        # Resolving the schema forces analysis, including on Spark Connect
+        df.schema
+        compile_seconds = time.time() - start_time
+
+        with self._lock:
+            self.stats["compiles"] += 1
+            self.stats["compile_seconds"] += compile_seconds
+            self._plans[key] = (df, now)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return df
+
+    def collect(self, **values) -> list:
+        """
+        Executes the template with the given values and returns its rows.
+
+        Args:
+            values: Identifier slots and parameter values
+
+        Returns:
+            List of Spark Rows
+        """
+        df = self.dataframe(**values)
+
+        start_time = time.time()
+        rows = df.collect()
+        execute_seconds = time.time() - start_time
+
+        with self._lock:
+            self.stats["executions"] += 1
+            self.stats["execute_seconds"] += execute_seconds
+        return rows
+
+    def clear(self):
+        """
+        Drops all cached DataFrames for this template.
+        """
+        with self._lock:
+            self._plans.clear()
+
+# COMMAND ----------
+
+def query_template_stats() -> dict:
+    """
+    Returns compile and execution statistics for every prepared template.
+
+    Returns:
+        Dictionary of template name -> stats
+    """
+    stats = {}
+    for name, template in QUERY_TEMPLATES.items():
+        with template._lock:
+            stats[name] = dict(template.stats)
+    return stats
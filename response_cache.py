@@ -0,0 +1,277 @@
+# Semantic response cache for the NBA Analysis Agent.
+# Repeated questions phrased slightly differently are answered from cache
+# instead of triggering a full model and tool round-trip.
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# COMMAND ----------
+
+# MAGIC %run ./table_versions
+
+# COMMAND ----------
+
+# Words that can change between phrasings of the same question and are
+# dropped before matching.
+FILLER_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "from", "by", "with", "at",
+    "and", "or", "across", "during", "over", "between", "vs", "versus",
+    "who", "what", "which", "how", "were", "was", "is", "are", "be", "been",
+    "did", "do", "does", "has", "have", "had", "can", "could", "would", "you",
+    "me", "i", "we", "us", "my", "their", "his", "her", "its",
+    "show", "list", "give", "tell", "get", "find", "display", "please",
+    "about", "including", "include", "all", "season", "seasons", "year",
+    "career", "statistics", "stats", "numbers", "player", "players", "nba",
+    "league", "per", "game"
+}
+
+# Words that describe the kind of analysis rather than what it is about.
+# They are compared by character n-gram similarity, so "efficient" and
+# "efficiency" or "progress" and "progression" still match.
+DESCRIPTIVE_WORDS = {
+    "compare", "analyze", "progression", "progress", "development", "trend",
+    "trends", "evolution", "average", "averages", "averaged", "efficient",
+    "efficiency", "profile", "similar", "like", "strengths", "strength",
+    "weaknesses", "weakness", "breakdown", "summary", "overview"
+}
+
+# Synonyms mapped to one canonical token before matching, so paraphrases of
+# a stat, ranking direction or position pass the entity check
+CANONICAL_TOKENS = {
+    **dict.fromkeys(["points", "point", "pts", "ppg", "scorers", "scorer", "scoring", "scored"], "pts"),
+    **dict.fromkeys(["rebounds", "rebound", "trb", "rpg", "boards", "rebounders", "rebounding"], "trb"),
+    **dict.fromkeys(["assists", "assist", "ast", "apg", "dimes", "passers", "playmakers"], "ast"),
+    **dict.fromkeys(["steals", "steal", "stl", "spg"], "stl"),
+    **dict.fromkeys(["blocks", "block", "blk", "bpg", "blockers", "shotblockers"], "blk"),
+    **dict.fromkeys(["ws", "winshares"], "ws"),
+    **dict.fromkeys(["top", "most", "highest", "best", "leading", "leaders", "leader", "led", "lead"], "top"),
+    **dict.fromkeys(["bottom", "least", "lowest", "worst", "fewest"], "bottom"),
+    **dict.fromkeys(["compare", "comparison", "compared", "comparing"], "compare"),
+    **dict.fromkeys(["analyze", "analysis", "analyse"], "analyze"),
+    **dict.fromkeys(["center", "centers", "c"], "c"),
+    **dict.fromkeys(["guard", "guards", "g"], "g"),
+    **dict.fromkeys(["forward", "forwards", "f"], "f")
+}
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a user query for cache matching.
+
+    Args:
+        query: The raw user query
+
+    Returns:
+        Lowercased query with punctuation removed and whitespace collapsed
+    """
+    query = query.lower().replace("'s", "")
+    query = re.sub(r"[^a-z0-9%\s]", " ", query)
+    return " ".join(query.split())
+
+def embed_query(normalized_query: str, ngram_sizes: tuple = (3, 4, 5)) -> dict:
+    """
+    Embeds a normalized query as an L2-normalized character n-gram vector.
+
+    Args:
+        normalized_query: Output of normalize_query
+        ngram_sizes: Character n-gram lengths to count
+
+    Returns:
+        Sparse vector as a dictionary of n-gram -> weight
+    """
+    padded = f" {normalized_query} "
+    counts = {}
+    for n in ngram_sizes:
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            counts[gram] = counts.get(gram, 0) + 1
+
+    # Sublinear term frequency keeps repeated words from dominating
+    vector = {gram: 1 + math.log(count) for gram, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if norm == 0:
+        return {}
+    return {gram: weight / norm for gram, weight in vector.items()}
+
+def _content_tokens(normalized_query: str) -> list:
+    tokens = [token for token in normalized_query.split() if token not in FILLER_WORDS]
+    return [CANONICAL_TOKENS.get(token, token) for token in tokens]
+
+def extract_entities(normalized_query: str) -> frozenset:
+    """
+    Returns the tokens that must match exactly between two cached queries.
+
+    Args:
+        normalized_query: Output of normalize_query
+
+    Returns:
+        Set of canonical content tokens other than DESCRIPTIVE_WORDS, e.g.
+        names, numbers, ranking direction, stat keywords and positions
+    """
+    return frozenset(token for token in _content_tokens(normalized_query) if token not in DESCRIPTIVE_WORDS)
+
+def embed_description(normalized_query: str) -> dict:
+    """
+    Embeds the DESCRIPTIVE_WORDS of a normalized query, in sorted order so
+    word order does not matter.
+
+    Args:
+        normalized_query: Output of normalize_query
+
+    Returns:
+        Sparse vector from embed_query, empty if the query has none
+    """
+    words = sorted(set(token for token in _content_tokens(normalized_query) if token in DESCRIPTIVE_WORDS))
+    return embed_query(" ".join(words)) if words else {}
+
+def conversation_context_id(history: list) -> str:
+    """
+    Hashes the recent conversation history into a cache scope.
+
+    Follow-up questions ("how many rebounds did he average?") only share a
+    cached answer when the conversation leading up to them is identical.
+
+    Args:
+        history: Recent conversation messages
+
+    Returns:
+        Hex digest identifying the conversation context
+    """
+    return hashlib.sha256(repr(list(history or [])).encode("utf-8")).hexdigest()
+
+def cosine_similarity(vector1: dict, vector2: dict) -> float:
+    """
+    Returns the cosine similarity of two L2-normalized sparse vectors; two
+    empty vectors are identical.
+    """
+    if not vector1 and not vector2:
+        return 1.0
+    if len(vector1) > len(vector2):
+        vector1, vector2 = vector2, vector1
+    return sum(weight * vector2.get(gram, 0.0) for gram, weight in vector1.items())
+
+# COMMAND ----------
+
+class ResponseCache:
+    """
+    LRU/TTL cache of agent responses keyed by query similarity.
+
+    Entries are scoped to a conversation context and are only returned
+    while the source tables are still at the versions they were answered
+    against. A fuzzy hit needs the same canonical entities (see
+    extract_entities), so "top 5 scorers 2015" matches "who were the top 5
+    points leaders in 2015" but not "top 5 scorers 2016", and similar
+    descriptive words (see embed_description). Lookups and stores are safe
+    to call from concurrent requests.
+
+    Args:
+        similarity_threshold: Minimum cosine similarity of the descriptive
+            words for a cache hit
+        ttl_seconds: Lifetime of a cached response
+        max_entries: Maximum cached responses across all contexts
+        tables: Source tables whose versions invalidate cached responses
+        version_check_seconds: How long table versions are reused before
+            being read again
+    """
+
+    def __init__(self, similarity_threshold: float = 0.7, ttl_seconds: int = 3600,
+                 max_entries: int = 256, tables: list = None, version_check_seconds: int = 60):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tables = tables if tables is not None else SOURCE_TABLES
+        self.version_check_seconds = version_check_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _current_table_versions(self) -> dict:
+        return current_table_versions(self.tables, self.version_check_seconds)
+
+    def _evict_expired(self, now: float):
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, query: str, context_id: str = "default"):
+        """
+        Returns a cached response for a similar query, or None.
+
+        Args:
+            query: The user query
+            context_id: Conversation the query belongs to
+
+        Returns:
+            The cached response string, or None on a miss
+        """
+        normalized = normalize_query(query)
+        table_versions = self._current_table_versions()
+
+        with self._lock:
+            self._evict_expired(time.time())
+
+            # Exact match on the normalized query skips the similarity scan
+            best_key = (context_id, normalized)
+            if best_key not in self._entries:
+                best_key = None
+                vector = embed_description(normalized)
+                entities = extract_entities(normalized)
+                best_score = self.similarity_threshold
+                for key, entry in self._entries.items():
+                    if key[0] != context_id or entry["entities"] != entities:
+                        continue
+                    score = cosine_similarity(vector, entry["vector"])
+                    if score >= best_score:
+                        best_key, best_score = key, score
+
+            entry = self._entries.get(best_key)
+            if entry is None or entry["table_versions"] != table_versions:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return entry["response"]
+
+    def store(self, query: str, response: str, context_id: str = "default"):
+        """
+        Caches a response for a query in the given conversation context.
+
+        Args:
+            query: The user query
+            response: The agent's response
+            context_id: Conversation the query belongs to
+        """
+        normalized = normalize_query(query)
+        key = (context_id, normalized)
+        entry = {
+            "vector": embed_description(normalized),
+            "entities": extract_entities(normalized),
+            "response": response,
+            "table_versions": self._current_table_versions(),
+            "created_at": time.time()
+        }
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self, context_id: str = None):
+        """
+        Drops cached responses for one conversation context, or all of them.
+        """
+        with self._lock:
+            if context_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == context_id]:
+                del self._entries[key]
@@ -0,0 +1,50 @@
+# Delta versions of the NBA source tables.
+# Shared by the response cache and the player store, which both read the
+# same memoized versions, so a table update invalidates cached answers and
+# reloads the store at the same moment.
+
+import threading
+import time
+
+# COMMAND ----------
+
+SOURCE_TABLES = ["player_data", "Seasons_Stats"]
+
+def get_table_versions(tables: list) -> dict:
+    """
+    Returns the current Delta version of each source table.
+
+    Args:
+        tables: Table names in the current catalog and schema
+
+    Returns:
+        Dictionary of table name -> latest Delta version
+    """
+    return {
+        table: int(spark.sql(f"DESCRIBE HISTORY {table} LIMIT 1").collect()[0]["version"])
+        for table in tables
+    }
+
+_table_versions = {}
+_table_versions_lock = threading.Lock()
+
+def current_table_versions(tables: list = None, max_age_seconds: int = 60) -> dict:
+    """
+    Returns the Delta versions of the given tables, reusing versions read
+    less than max_age_seconds ago.
+
+    Args:
+        tables: Table names, SOURCE_TABLES by default
+        max_age_seconds: How long versions are reused before being read again
+
+    Returns:
+        Dictionary of table name -> Delta version
+    """
+    key = tuple(tables if tables is not None else SOURCE_TABLES)
+    with _table_versions_lock:
+        now = time.time()
+        cached = _table_versions.get(key)
+        if cached is None or now - cached[1] > max_age_seconds:
+            cached = (get_table_versions(list(key)), now)
+            _table_versions[key] = cached
+        return cached[0]